@@ -0,0 +1,27 @@
+"""Предварительная компиляция ядер Numba в кэш (запускать после установки)."""
+
+import importlib.util
+import os
+import time
+from pathlib import Path
+
+KERNELS_PATH = Path(__file__).resolve().parent.parent / 'src' / '_kernels.py'
+
+
+def main():
+    """Компиляция всех ядер Numba с сохранением в NUMBA_CACHE_DIR."""
+    start = time.time()
+    
+    # Модуль загружается напрямую, без src/__init__.py: иначе ради одного
+    # ядра импортировались бы ultralytics и torch. Импорт компилирует
+    # и прогревает ядра на фиктивных данных
+    spec = importlib.util.spec_from_file_location('_kernels', KERNELS_PATH)
+    kernels = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(kernels)
+    
+    print(f"Ядра Numba скомпилированы за {time.time() - start:.2f} сек")
+    print(f"Кэш: {os.environ['NUMBA_CACHE_DIR']}")
+
+
+if __name__ == "__main__":
+    main()
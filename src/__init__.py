@@ -1,4 +1,9 @@
-from .detector import PersonDetector
+from .detector import Detections, PersonDetector, StagedBatch
+from .parallel_decoder import ParallelDecoder
+from .scheduler import BatchScheduler, FrameSource
+from .tracker import BoxTracker
 from .video_processor import VideoProcessor
 
-__all__ = ['PersonDetector', 'VideoProcessor']
+__all__ = ['BatchScheduler', 'BoxTracker', 'Detections', 'FrameSource',
+           'ParallelDecoder', 'PersonDetector', 'StagedBatch', 
+           'VideoProcessor']
@@ -0,0 +1,69 @@
+"""JIT-ядра Numba для постобработки детекций."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Кэш скомпилированных ядер в репозитории: JIT-компиляция оплачивается
+# один раз, а не при каждом запуске (задается до импорта numba)
+os.environ.setdefault(
+    'NUMBA_CACHE_DIR', 
+    str(Path(__file__).resolve().parent.parent / '.numba_cache')
+)
+
+try:
+    from numba import njit
+except ImportError:  # Без Numba ядра работают как обычный Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def filter_boxes(xyxy, conf, scale, dx, dy, width, height):
+    """
+    Перевод bbox из letterbox в координаты кадра и отбор валидных.
+    
+    За один проход: снятие смещения и масштаба, обрезка по границам кадра,
+    приведение к int32 и удаление вырожденных bbox.
+    
+    Args:
+        xyxy: Координаты bbox [N, 4] float32 во входе модели
+        conf: Уверенность детекций [N] float32
+        scale: Коэффициент масштаба letterbox
+        dx: Смещение letterbox по X
+        dy: Смещение letterbox по Y
+        width: Ширина исходного кадра
+        height: Высота исходного кадра
+        
+    Returns:
+        Валидные bbox [K, 4] int32 и их уверенность [K] float32
+    """
+    n = xyxy.shape[0]
+    bboxes = np.empty((n, 4), dtype=np.int32)
+    confidences = np.empty(n, dtype=np.float32)
+    k = 0
+    
+    for i in range(n):
+        x1 = int(min(max((xyxy[i, 0] - dx) / scale, 0.0), width))
+        y1 = int(min(max((xyxy[i, 1] - dy) / scale, 0.0), height))
+        x2 = int(min(max((xyxy[i, 2] - dx) / scale, 0.0), width))
+        y2 = int(min(max((xyxy[i, 3] - dy) / scale, 0.0), height))
+        
+        if x2 > x1 and y2 > y1:
+            bboxes[k, 0] = x1
+            bboxes[k, 1] = y1
+            bboxes[k, 2] = x2
+            bboxes[k, 3] = y2
+            confidences[k] = conf[i]
+            k += 1
+    
+    return bboxes[:k], confidences[:k]
+
+
+# Прогрев: компиляция (или загрузка из кэша) при импорте, а не на первом кадре
+filter_boxes(np.zeros((1, 4), dtype=np.float32), 
+             np.zeros(1, dtype=np.float32), 
+             1.0, 0.0, 0.0, 1.0, 1.0)
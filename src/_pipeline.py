@@ -0,0 +1,37 @@
+"""Общие примитивы очередей для потоков конвейера."""
+
+import queue
+import threading
+from typing import Optional
+
+
+# Маркер конца потока кадров в очередях конвейера
+_SENTINEL = None
+
+
+def _put_until_stopped(q: queue.Queue,
+                       item,
+                       stop_event: threading.Event,
+                       consumer: Optional[threading.Thread] = None) -> bool:
+    """
+    Кладет элемент в очередь, не блокируясь навсегда при остановке.
+    
+    Args:
+        q: Очередь назначения
+        item: Элемент
+        stop_event: Событие досрочной остановки конвейера
+        consumer: Поток-потребитель очереди; если он завершился, ждать
+            освобождения места бессмысленно
+        
+    Returns:
+        True, если элемент помещен в очередь
+    """
+    while not stop_event.is_set():
+        if consumer is not None and not consumer.is_alive():
+            return False
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
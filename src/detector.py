@@ -1,10 +1,138 @@
 """Модуль для детекции людей с использованием YOLO26."""
 
 from ultralytics import YOLO
+from ultralytics.utils import ops
 import cv2
 import numpy as np
-from typing import List, Tuple, Optional
+from dataclasses import dataclass
+from pathlib import Path
+import shutil
+import time
+from typing import Dict, List, Tuple, Optional
 import torch
+import torch.nn.functional as F
+from ._kernels import filter_boxes
+
+
+@dataclass
+class Detections:
+    """
+    Детекции одного кадра в виде структуры массивов.
+    
+    Attributes:
+        bboxes: Координаты bbox (x1, y1, x2, y2), массив [N, 4] int32
+        confidences: Уверенность детекций, массив [N] float32
+    """
+    bboxes: np.ndarray
+    confidences: np.ndarray
+    
+    @classmethod
+    def empty(cls) -> 'Detections':
+        """Пустой набор детекций."""
+        return cls(
+            bboxes=np.empty((0, 4), dtype=np.int32),
+            confidences=np.empty(0, dtype=np.float32)
+        )
+
+
+@dataclass
+class StagedBatch:
+    """
+    Пачка кадров, отправленная на GPU до запуска модели.
+    
+    Attributes:
+        frames: Исходные кадры в формате BGR
+        batch: Тензор BCHW на GPU (None - пачка идет через predict)
+        letterbox_meta: Масштаб, смещение и исходный размер каждого кадра
+        ready: Событие завершения загрузки на побочном потоке CUDA
+    """
+    frames: List[np.ndarray]
+    batch: Optional[torch.Tensor] = None
+    letterbox_meta: Optional[List[tuple]] = None
+    ready: Optional[torch.cuda.Event] = None
+
+
+def _letterbox_params(h: int, 
+                      w: int, 
+                      size: int = 640) -> Tuple[float, Tuple[int, int], Tuple[int, int]]:
+    """
+    Геометрия letterbox для кадра h x w.
+    
+    Args:
+        h: Высота кадра
+        w: Ширина кадра
+        size: Сторона выходного квадрата
+        
+    Returns:
+        Коэффициент масштаба, размер (new_w, new_h) и смещение (dx, dy)
+    """
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    dx, dy = (size - new_w) // 2, (size - new_h) // 2
+    
+    return scale, (new_w, new_h), (dx, dy)
+
+
+def _letterbox(frame: np.ndarray, 
+               size: int = 640,
+               pad_value: int = 114,
+               out: Optional[np.ndarray] = None
+               ) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Масштабирование кадра с сохранением пропорций и дополнением до квадрата.
+    
+    Args:
+        frame: Входной кадр в формате BGR
+        size: Сторона выходного квадрата
+        pad_value: Значение пикселей дополнения
+        out: Предвыделенный буфер size x size x 3 uint8 для результата
+        
+    Returns:
+        Кадр size x size, коэффициент масштаба и смещение (dx, dy)
+    """
+    h, w = frame.shape[:2]
+    scale, (new_w, new_h), (dx, dy) = _letterbox_params(h, w, size)
+    
+    if out is None:
+        out = np.empty((size, size, 3), dtype=np.uint8)
+    
+    # Заполняем только полосы дополнения, а не весь буфер
+    out[:dy] = pad_value
+    out[dy + new_h:] = pad_value
+    out[dy:dy + new_h, :dx] = pad_value
+    out[dy:dy + new_h, dx + new_w:] = pad_value
+    
+    # Без горизонтального дополнения область кадра непрерывна в памяти,
+    # и cv2.resize пишет прямо в буфер без промежуточного массива
+    region = out[dy:dy + new_h, dx:dx + new_w]
+    if region.flags['C_CONTIGUOUS']:
+        cv2.resize(frame, (new_w, new_h), dst=region, 
+                   interpolation=cv2.INTER_LINEAR)
+    else:
+        region[:] = cv2.resize(frame, (new_w, new_h), 
+                               interpolation=cv2.INTER_LINEAR)
+    
+    return out, scale, (dx, dy)
+
+
+def _blit(frame: np.ndarray, image: np.ndarray, x: int, y: int):
+    """
+    Копирование изображения на кадр в точку (x, y) с обрезкой по границам.
+    
+    Args:
+        frame: Кадр, на который копируется изображение
+        image: Копируемое изображение
+        x: Левая граница на кадре
+        y: Верхняя граница на кадре
+    """
+    h, w = frame.shape[:2]
+    ih, iw = image.shape[:2]
+    
+    fx1, fy1 = max(x, 0), max(y, 0)
+    fx2, fy2 = min(x + iw, w), min(y + ih, h)
+    
+    if fx2 > fx1 and fy2 > fy1:
+        frame[fy1:fy2, fx1:fx2] = image[fy1 - y:fy2 - y, fx1 - x:fx2 - x]
 
 
 class PersonDetector:
@@ -17,13 +145,24 @@ class PersonDetector:
         iou_threshold: Порог IoU (для версий с NMS)
         person_class_id: ID класса 'person' в COCO dataset
         device: Устройство для инференса (cuda/cpu)
+        half: Инференс в FP16
+        use_trt: Используется ли TensorRT-движок
+        int8: Используется ли INT8-квантование движка
+        compiled: Скомпилирована ли модель через torch.compile
+        max_batch: Максимальный размер пачки
     """
     
     def __init__(self, 
                  model_name: str = 'yolo26x.pt',
                  conf_threshold: float = 0.30,
                  iou_threshold: float = 0.45,
-                 device: Optional[str] = None):
+                 device: Optional[str] = None,
+                 use_trt: bool = False,
+                 half: bool = False,
+                 max_batch: int = 8,
+                 int8: bool = False,
+                 calib_video: Optional[str] = None,
+                 compile: bool = False):
         """
         Инициализация детектора с YOLO26.
         
@@ -32,23 +171,236 @@ class PersonDetector:
             conf_threshold: Минимальная уверенность для детекции
             iou_threshold: Порог IoU для фильтрации
             device: Устройство ('cuda', 'cpu', или None для автовыбора)
+            use_trt: Экспортировать модель в TensorRT-движок FP16 (только CUDA)
+            half: Инференс в FP16 (только CUDA)
+            max_batch: Максимальный размер пачки для TensorRT-движка; до него
+                дополняются пачки скомпилированной модели
+            int8: Экспортировать TensorRT-движок INT8 с калибровкой
+            calib_video: Видео для выборки калибровочных кадров INT8
+            compile: Компилировать модель через torch.compile, если
+                TensorRT не используется
         """
         if device is None:
             self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         else:
             self.device = device
             
+        self.half = half and self.device == 'cuda'
+        self.use_trt = ((use_trt or int8) and self.device == 'cuda' 
+                        and model_name.endswith('.pt'))
+        self.int8 = int8 and self.use_trt
+        
+        if (use_trt or int8) and not self.use_trt:
+            print("⚠️ Экспорт в TensorRT доступен только для .pt модели на CUDA, "
+                  "флаги --trt/--int8 игнорируются")
+        
+        if self.int8 and calib_video is None:
+            raise ValueError("Для INT8 необходимо указать calib_video")
+        
         print(f"Загрузка модели {model_name} на {self.device}...")
         self.model = YOLO(model_name)
-        self.model.to(self.device)
+        
+        if self.use_trt:
+            self.model = self._load_engine(
+                model_name, max_batch, calib_video if self.int8 else None
+            )
+        else:
+            self.model.to(self.device)
+        
+        self.compiled = compile and not self.use_trt
+        self.max_batch = max_batch
         
         self.conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
         self.person_class_id = 0
         
+        # Загрузка кадров на GPU через pinned-память на отдельном потоке
+        # CUDA, чтобы копирование следующей пачки шло во время инференса
+        self._use_pinned = self.device == 'cuda'
+        self._upload_stream = torch.cuda.Stream() if self._use_pinned else None
+        # Промежуточный pinned-буфер для кадров из обычной памяти
+        self._pinned: Optional[torch.Tensor] = None
+        self._copy_done: Optional[torch.cuda.Event] = None
+        
+        # Буфер letterbox для CPU-пути (заполняется без аллокаций на кадр)
+        self._letterbox_buf = np.empty((max_batch, 640, 640, 3), dtype=np.uint8)
+        
+        # Кэш растеризованных меток; метки для параметров по умолчанию
+        # готовятся заранее
+        self._label_cache: Dict[tuple, Tuple[np.ndarray, int, int]] = {}
+        for i in range(101):
+            self._label_image(f"person: {i / 100:.2f}", 0.6, 2)
+        
+        if self.compiled:
+            self._compile_model()
+        
         print(f"Модель загружена успешно. Использование: {self.device.upper()}")
         
-    def detect_persons(self, frame: np.ndarray) -> List[dict]:
+    def _compile_model(self, warmup_runs: int = 2):
+        """
+        Компиляция nn.Module через torch.compile и прогрев.
+        
+        Компилируется модуль, который реально вызывает предиктор
+        ultralytics: AutoBackend при создании делает fuse() и сохраняет
+        исходный DetectionModel, поэтому обертка над self.model.model
+        до первого predict была бы отброшена. Короткие пачки дополняются
+        до max_batch, поэтому прогрев на пачке max_batch оплачивает всю
+        стоимость JIT-компиляции и записи CUDA-графов до начала обработки.
+        
+        Args:
+            warmup_runs: Количество прогревочных вызовов
+        """
+        dummy = [np.zeros((640, 640, 3), dtype=np.uint8)] * self.max_batch
+        
+        # Первый вызов создает предиктор и AutoBackend с fused-моделью,
+        # второй - замер eager-режима
+        self.detect_persons_batch(dummy)
+        eager_start = time.time()
+        self.detect_persons_batch(dummy)
+        eager_time = (time.time() - eager_start) / self.max_batch
+        
+        print("Компиляция модели через torch.compile...")
+        backend = self.model.predictor.model
+        backend.model = torch.compile(
+            backend.model,
+            mode='reduce-overhead',
+            fullgraph=False
+        )
+        
+        for _ in range(warmup_runs):
+            self.detect_persons_batch(dummy)
+        
+        compiled_start = time.time()
+        self.detect_persons_batch(dummy)
+        compiled_time = (time.time() - compiled_start) / self.max_batch
+        
+        print(f"Время кадра: eager {eager_time * 1000:.1f} мс, "
+              f"torch.compile {compiled_time * 1000:.1f} мс")
+    
+    def _load_engine(self, 
+                     model_name: str, 
+                     max_batch: int,
+                     calib_video: Optional[str] = None) -> YOLO:
+        """
+        Загрузка TensorRT-движка, экспорт при первом запуске.
+        
+        Движок (и кэш калибровки INT8) сохраняется рядом с .pt файлом
+        и переиспользуется при повторных запусках. Профиль движка зависит
+        от максимального размера пачки и входа модели, поэтому они входят
+        в имя файла: движок под меньшую пачку не будет подхвачен.
+        
+        Args:
+            model_name: Имя .pt модели YOLO26
+            max_batch: Максимальный размер пачки для движка
+            calib_video: Видео для калибровки; если задано - движок INT8,
+                иначе FP16
+            
+        Returns:
+            Модель YOLO, загруженная из .engine файла
+        """
+        int8 = calib_video is not None
+        imgsz = 640
+        precision_tag = '-int8' if int8 else ''
+        engine_path = Path(model_name).with_name(
+            f"{Path(model_name).stem}{precision_tag}-b{max_batch}-{imgsz}.engine"
+        )
+        
+        if not engine_path.exists():
+            precision = 'INT8' if int8 else 'FP16'
+            print(f"Экспорт в TensorRT {precision}: {engine_path}...")
+            
+            export_args = dict(
+                format='engine',
+                half=not int8,
+                imgsz=imgsz,
+                dynamic=True,
+                batch=max_batch,
+                device=self.device
+            )
+            if int8:
+                export_args.update(
+                    int8=True,
+                    data=self._prepare_calibration(model_name, calib_video)
+                )
+            
+            exported = Path(self.model.export(**export_args))
+            
+            # Экспорт всегда пишет <model>.engine - переименовываем под
+            # точность, чтобы FP16 и INT8 движки не затирали друг друга.
+            # Веса могут лежать в weights_dir ultralytics на другой файловой
+            # системе, поэтому move, а не rename
+            if exported != engine_path:
+                shutil.move(str(exported), str(engine_path))
+                calib_cache = exported.with_suffix('.cache')
+                if calib_cache.exists():
+                    shutil.move(str(calib_cache), 
+                                str(engine_path.with_suffix('.cache')))
+        
+        print(f"Использование TensorRT-движка: {engine_path}")
+        return YOLO(str(engine_path), task='detect')
+    
+    def _prepare_calibration(self, 
+                             model_name: str,
+                             calib_video: str,
+                             num_frames: int = 500) -> str:
+        """
+        Выборка калибровочных кадров из видео для INT8-квантования.
+        
+        Кадры приводятся к 640x640 (letterbox) и сохраняются на диск
+        вместе с calib.yaml; при повторном запуске выборка не повторяется.
+        
+        Args:
+            model_name: Имя .pt модели (определяет директорию кэша)
+            calib_video: Путь к видео для выборки кадров
+            num_frames: Количество калибровочных кадров
+            
+        Returns:
+            Путь к calib.yaml для model.export(data=...)
+        """
+        calib_dir = (Path(model_name).parent / 'calib' 
+                     / Path(calib_video).stem).resolve()
+        images_dir = calib_dir / 'images'
+        yaml_path = calib_dir / 'calib.yaml'
+        
+        if not any(images_dir.glob('*.jpg')):
+            cap = cv2.VideoCapture(calib_video)
+            
+            if not cap.isOpened():
+                raise ValueError(
+                    f"Не удалось открыть видео для калибровки: {calib_video}"
+                )
+            
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            step = max(1, total_frames // num_frames)
+            images_dir.mkdir(parents=True, exist_ok=True)
+            
+            print(f"Выборка {num_frames} кадров для калибровки INT8...")
+            index = saved = 0
+            while saved < num_frames:
+                ret, frame = cap.read()
+                
+                if not ret:
+                    break
+                
+                if index % step == 0:
+                    image, _, _ = _letterbox(frame)
+                    cv2.imwrite(str(images_dir / f'{saved:05d}.jpg'), image)
+                    saved += 1
+                index += 1
+            
+            cap.release()
+        
+        yaml_path.write_text(
+            f"path: {calib_dir}\n"
+            f"train: images\n"
+            f"val: images\n"
+            f"names:\n"
+            f"  0: person\n"
+        )
+        
+        return str(yaml_path)
+    
+    def detect_persons(self, frame: np.ndarray) -> Detections:
         """
         Детекция людей на кадре с использованием YOLO26.
         
@@ -56,117 +408,492 @@ class PersonDetector:
             frame: Входной кадр в формате BGR
             
         Returns:
-            Список словарей с информацией о детекциях
+            Детекции людей на кадре
+        """
+        return self.detect_persons_batch([frame])[0]
+    
+    def detect_persons_batch(self, frames: List[np.ndarray]) -> List[Detections]:
+        """
+        Детекция людей на пачке кадров за один вызов модели.
+        
+        Args:
+            frames: Список входных кадров в формате BGR
+            
+        Returns:
+            Список детекций для каждого кадра (в том же порядке)
+        """
+        return self.detect_staged(self.stage_batch(frames))
+    
+    def allocate_frames(self, count: int, height: int, width: int) -> np.ndarray:
+        """
+        Выделение пула буферов кадров для декодирования.
+        
+        На CUDA пул выделяется в page-locked памяти: кадры декодируются
+        сразу в pinned-буферы и уходят на GPU через DMA без memcpy.
+        
+        Args:
+            count: Количество буферов
+            height: Высота кадра
+            width: Ширина кадра
+            
+        Returns:
+            Массив [count, height, width, 3] uint8
+        """
+        shape = (count, height, width, 3)
+        
+        if self._use_pinned:
+            return torch.empty(shape, dtype=torch.uint8, pin_memory=True).numpy()
+        
+        return np.empty(shape, dtype=np.uint8)
+    
+    def stage_batch(self, frames: List[np.ndarray]) -> StagedBatch:
+        """
+        Асинхронная загрузка пачки на GPU для последующего detect_staged.
+        
+        Копирование и предобработка ставятся в очередь побочного потока
+        CUDA и выполняются параллельно с инференсом предыдущей пачки.
+        
+        Args:
+            frames: Список входных кадров в формате BGR
+            
+        Returns:
+            Подготовленная пачка
+        """
+        same_size = all(f.shape == frames[0].shape for f in frames)
+        
+        if self._use_pinned and same_size:
+            return self._stage_batch(frames)
+        
+        return StagedBatch(frames=frames)
+    
+    def detect_staged(self, staged: StagedBatch) -> List[Detections]:
+        """
+        Детекция людей на пачке, подготовленной через stage_batch.
+        
+        Args:
+            staged: Подготовленная пачка
+            
+        Returns:
+            Список детекций для каждого кадра (в том же порядке)
         """
+        # GPU-тензор идет напрямую в AutoBackend: predict для тензорного
+        # источника копирует всю пачку обратно на CPU ради orig_img
+        if staged.batch is not None:
+            torch.cuda.current_stream().wait_event(staged.ready)
+            dets = self._postprocess(
+                self._forward(staged.batch), 
+                self.conf_threshold, 
+                self.iou_threshold
+            )
+            return [self._to_detections(det[:, :4], det[:, 4], meta)
+                    for det, meta in zip(dets, staged.letterbox_meta)]
+        
+        frames = staged.frames
+        source, letterbox_meta = self._letterbox_batch(frames)
+        
+        # Скомпилированная модель получает пачки одного размера, иначе
+        # хвостовая пачка вызывает перекомпиляцию
+        if self.compiled and len(source) < self.max_batch:
+            source = source + [source[0]] * (self.max_batch - len(source))
+        
         results = self.model.predict(
-            frame, 
+            source, 
+            imgsz=640,
             conf=self.conf_threshold,
             iou=self.iou_threshold,
             classes=[self.person_class_id],
             verbose=False,
-            device=self.device
+            device=self.device,
+            half=self.half,
+            batch=len(source)
         )
         
-        detections = []
+        # Результаты дополнения отбрасываются по длине letterbox_meta
+        return [self._parse_result(result, meta) 
+                for result, meta in zip(results, letterbox_meta)]
+    
+    def _letterbox_batch(self, 
+                         frames: List[np.ndarray],
+                         imgsz: int = 640) -> Tuple[List[np.ndarray], List[tuple]]:
+        """
+        Приведение пачки кадров к imgsz x imgsz в переиспользуемый буфер.
+        
+        Кадры уже нужного размера ultralytics не масштабирует повторно.
         
-        for result in results:
-            boxes = result.boxes
+        Args:
+            frames: Список входных кадров в формате BGR
+            imgsz: Размер входа модели
             
-            if boxes is None or len(boxes) == 0:
-                continue
-                
-            for box in boxes:
-                # Извлечение координат bbox
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = float(box.conf[0])
-                class_id = int(box.cls[0])
-                
-                # Проверка валидности bbox
-                if x2 > x1 and y2 > y1:
-                    detections.append({
-                        'bbox': (int(x1), int(y1), int(x2), int(y2)),
-                        'confidence': confidence,
-                        'class_name': 'person',
-                        'class_id': class_id
-                    })
-                
+        Returns:
+            Кадры letterbox (виды на буфер) и параметры letterbox
+        """
+        if self._letterbox_buf.shape[0] < len(frames):
+            self._letterbox_buf = np.empty((len(frames), imgsz, imgsz, 3), 
+                                           dtype=np.uint8)
+        
+        images, letterbox_meta = [], []
+        for frame, buf in zip(frames, self._letterbox_buf):
+            image, scale, pad = _letterbox(frame, imgsz, out=buf)
+            images.append(image)
+            letterbox_meta.append((scale, pad, frame.shape[:2]))
+        
+        return images, letterbox_meta
+    
+    def _stage_batch(self, 
+                     frames: List[np.ndarray],
+                     imgsz: int = 640) -> StagedBatch:
+        """
+        Загрузка пачки кадров на GPU через pinned-память.
+        
+        Кадры из pinned-пула (allocate_frames) копируются на GPU напрямую,
+        остальные - через промежуточный pinned-буфер. Пересылка, BGR->RGB,
+        нормализация и letterbox до imgsz x imgsz ставятся в очередь
+        побочного потока CUDA и не ждут инференса на основном.
+        
+        Args:
+            frames: Список входных кадров в формате BGR одного размера
+            imgsz: Размер входа модели
+            
+        Returns:
+            Пачка с тензором на GPU и событием готовности
+        """
+        n = len(frames)
+        h, w = frames[0].shape[:2]
+        
+        # Тип входа сети; первый вызов может создать предиктор, поэтому
+        # до перехода на побочный поток
+        dtype = torch.float16 if self._backend().fp16 else torch.float32
+        
+        sources = [torch.from_numpy(frame) for frame in frames]
+        staged = not all(src.is_pinned() for src in sources)
+        
+        if staged:
+            # Буфер можно переписывать только после завершения прошлой копии
+            if self._copy_done is not None:
+                self._copy_done.synchronize()
+            
+            pinned = self._pinned
+            if (pinned is None or pinned.shape[0] < n 
+                    or pinned.shape[1:3] != (h, w)):
+                pinned = torch.empty((n, h, w, 3), 
+                                     dtype=torch.uint8, 
+                                     pin_memory=True)
+                self._pinned = pinned
+            
+            pinned_np = pinned.numpy()
+            for i, frame in enumerate(frames):
+                pinned_np[i] = frame
+            sources = list(pinned[:n])
+        
+        scale, (new_w, new_h), (dx, dy) = _letterbox_params(h, w, imgsz)
+        letterbox_meta = [(scale, (dx, dy), (h, w))] * n
+        
+        with torch.cuda.stream(self._upload_stream):
+            batch = torch.empty((n, h, w, 3), 
+                                dtype=torch.uint8, 
+                                device=self.device)
+            for dst, src in zip(batch, sources):
+                dst.copy_(src, non_blocking=True)
+            
+            if staged:
+                self._copy_done = torch.cuda.Event()
+                self._copy_done.record()
+            
+            # Приведение к типу входа сети до масштабирования: float32 кадра
+            # в исходном разрешении занимал бы вдвое больше памяти GPU
+            batch = batch.permute(0, 3, 1, 2).flip(1).to(dtype).mul_(1 / 255.0)
+            if (new_h, new_w) != (h, w):
+                batch = F.interpolate(batch, size=(new_h, new_w), 
+                                      mode='bilinear', align_corners=False)
+            batch = F.pad(batch, 
+                          (dx, imgsz - new_w - dx, dy, imgsz - new_h - dy),
+                          value=114 / 255.0)
+            
+            # permute дает channels_last-вид, и все операции выше сохраняют
+            # этот порядок; TensorRT читает буфер как плотный NCHW
+            batch = batch.contiguous()
+            
+            ready = torch.cuda.Event()
+            ready.record()
+        
+        # Тензор создан на побочном потоке, а читается основным
+        batch.record_stream(torch.cuda.current_stream())
+        
+        return StagedBatch(frames=frames, 
+                           batch=batch, 
+                           letterbox_meta=letterbox_meta, 
+                           ready=ready)
+    
+    def _parse_result(self, 
+                      result, 
+                      letterbox_meta: Optional[tuple] = None) -> Detections:
+        """
+        Преобразование результата YOLO для одного кадра в детекции.
+        
+        Args:
+            result: Объект Results из ultralytics
+            letterbox_meta: Масштаб, смещение и исходный размер (h, w)
+                кадра, если на вход модели подавался letterbox
+            
+        Returns:
+            Детекции людей на кадре
+        """
+        boxes = result.boxes
+        
+        if boxes is None or len(boxes) == 0:
+            return Detections.empty()
+            
+        if letterbox_meta is None:
+            letterbox_meta = (1.0, (0, 0), result.orig_shape)
+        
+        return self._to_detections(boxes.xyxy, boxes.conf, letterbox_meta)
+    
+    @staticmethod
+    def _to_detections(xyxy: torch.Tensor, 
+                       conf: torch.Tensor,
+                       letterbox_meta: tuple) -> Detections:
+        """
+        Перевод bbox из входа модели в координаты кадра.
+        
+        Args:
+            xyxy: Координаты bbox [N, 4] во входе модели
+            conf: Уверенность детекций [N]
+            letterbox_meta: Масштаб, смещение и исходный размер (h, w) кадра
+            
+        Returns:
+            Детекции людей на кадре
+        """
+        # Одна пересылка GPU->CPU на кадр вместо пересылки на каждый bbox
+        xyxy = xyxy.cpu().numpy().astype(np.float32)
+        confs = conf.cpu().numpy().astype(np.float32)
+        scale, (dx, dy), (h, w) = letterbox_meta
+        
+        # Перевод из letterbox в координаты кадра и проверка валидности bbox
+        bboxes, confidences = filter_boxes(
+            xyxy, confs, float(scale), float(dx), float(dy), float(w), float(h)
+        )
+        
+        return Detections(bboxes=bboxes, confidences=confidences)
+    
+    def _backend(self):
+        """
+        AutoBackend предиктора ultralytics (единый вызов для .pt и .engine).
+        
+        Предиктор создается при первом вызове predict, поэтому при
+        необходимости выполняется один predict на пустом кадре.
+        
+        Returns:
+            Модуль AutoBackend
+        """
+        if self.model.predictor is None:
+            self.model.predict(
+                np.zeros((640, 640, 3), dtype=np.uint8),
+                imgsz=640,
+                verbose=False,
+                device=self.device,
+                half=self.half
+            )
+        return self.model.predictor.model
+    
+    def _forward(self, batch: torch.Tensor) -> torch.Tensor:
+        """
+        Прогон сети на подготовленной пачке без постобработки.
+        
+        Args:
+            batch: Тензор BCHW RGB [0, 1] размера входа модели
+            
+        Returns:
+            Сырой выход детекционной головы
+        """
+        backend = self._backend()
+        batch = batch.half() if backend.fp16 else batch.float()
+        # AutoBackend передает в TensorRT data_ptr() без учета strides
+        batch = batch.contiguous()
+        
+        # Скомпилированная модель получает пачки одного размера, иначе
+        # хвостовая пачка вызывает перекомпиляцию и запись CUDA-графа
+        n = batch.shape[0]
+        if self.compiled and n < self.max_batch:
+            batch = torch.cat(
+                [batch, batch.new_zeros((self.max_batch - n, *batch.shape[1:]))]
+            )
+        
+        with torch.inference_mode():
+            preds = backend(batch)
+        
+        if isinstance(preds, (list, tuple)):
+            preds = preds[0]
+        
+        return preds[:n]
+    
+    def _postprocess(self, 
+                     preds: torch.Tensor,
+                     conf: float,
+                     iou: float) -> List[torch.Tensor]:
+        """
+        NMS (или отбор по уверенности для end-to-end моделей) по пачке.
+        
+        Args:
+            preds: Сырой выход детекционной головы
+            conf: Порог уверенности
+            iou: Порог IoU
+            
+        Returns:
+            Детекции [N, 6] (x1, y1, x2, y2, conf, cls) для каждого кадра
+        """
+        if getattr(self._backend(), 'end2end', False):
+            # Выход [B, max_det, 6]: x1, y1, x2, y2, conf, cls без NMS
+            keep = ((preds[..., 4] > conf) 
+                    & (preds[..., 5] == self.person_class_id))
+            return [det[mask] for det, mask in zip(preds, keep)]
+        
+        return ops.non_max_suppression(
+            preds, conf, iou, classes=[self.person_class_id]
+        )
+    
+    def detect_with_feature_cache(
+            self, 
+            frame: np.ndarray,
+            thresholds: List[Tuple[float, float]]) -> List[Detections]:
+        """
+        Детекция с несколькими порогами за один прогон сети.
+        
+        Backbone и голова YOLO считаются один раз, их выход кэшируется,
+        а для каждой пары порогов повторяется только постобработка
+        (NMS или отбор по уверенности для end-to-end моделей).
+        
+        Args:
+            frame: Входной кадр в формате BGR
+            thresholds: Список пар (conf_threshold, iou_threshold)
+            
+        Returns:
+            Детекции для каждой пары порогов (в том же порядке)
+        """
+        if self._use_pinned:
+            staged = self._stage_batch([frame])
+            torch.cuda.current_stream().wait_event(staged.ready)
+            batch, letterbox_meta = staged.batch, staged.letterbox_meta
+        else:
+            image, scale, pad = _letterbox(frame)
+            batch = torch.from_numpy(image[None, ..., ::-1].copy())
+            batch = batch.permute(0, 3, 1, 2).float().div_(255.0)
+            letterbox_meta = [(scale, pad, frame.shape[:2])]
+        
+        preds = self._forward(batch)
+        
+        detections = []
+        for conf, iou in thresholds:
+            det = self._postprocess(preds, conf, iou)[0]
+            detections.append(
+                self._to_detections(det[:, :4], det[:, 4], letterbox_meta[0])
+            )
+        
         return detections
     
     def draw_detections(self, 
                        frame: np.ndarray, 
-                       detections: List[dict],
+                       detections: Detections,
                        line_thickness: int = 2,
-                       font_scale: float = 0.6) -> np.ndarray:
+                       font_scale: float = 0.6,
+                       in_place: bool = False) -> np.ndarray:
         """
         Отрисовка детекций на кадре с оптимизированной визуализацией.
         
         Args:
             frame: Исходный кадр
-            detections: Список детекций
+            detections: Детекции на кадре
             line_thickness: Толщина линий bbox
             font_scale: Размер шрифта
+            in_place: Рисовать прямо на входном кадре без копирования
             
         Returns:
             Кадр с отрисованными детекциями
         """
-        output_frame = frame.copy()
+        output_frame = frame if in_place else frame.copy()
         
         # Цветовая схема
         bbox_color = (0, 255, 0)  
-        text_bg_color = (0, 255, 0)  
-        text_color = (0, 0, 0) 
         
-        for det in detections:
-            x1, y1, x2, y2 = det['bbox']
-            confidence = det['confidence']
-            class_name = det['class_name']
-            
-            # Рисуем bounding box
-            cv2.rectangle(
-                output_frame, 
-                (x1, y1), 
-                (x2, y2), 
-                bbox_color, 
-                line_thickness
-            )
-            
-            # Подготовка текста с метками
-            label = f"{class_name}: {confidence:.2f}"
+        h, w = output_frame.shape[:2]
+        t = line_thickness
+        
+        # Обрезаем bbox по границам кадра один раз для всех детекций,
+        # иначе отрицательные индексы в срезах ниже "заворачиваются"
+        bboxes = detections.bboxes.copy()
+        bboxes[:, 0::2] = np.clip(bboxes[:, 0::2], 0, w)
+        bboxes[:, 1::2] = np.clip(bboxes[:, 1::2], 0, h)
+        
+        for (x1, y1, x2, y2), confidence in zip(bboxes.tolist(),
+                                                 detections.confidences.tolist()):
+            # Рисуем bounding box четырьмя заливками полос через срезы
+            output_frame[y1:y1 + t, x1:x2] = bbox_color
+            output_frame[max(y2 - t, 0):y2, x1:x2] = bbox_color
+            output_frame[y1:y2, x1:x1 + t] = bbox_color
+            output_frame[y1:y2, max(x2 - t, 0):x2] = bbox_color
             
-            # Получаем размер текста
-            (text_width, text_height), baseline = cv2.getTextSize(
-                label, 
-                cv2.FONT_HERSHEY_SIMPLEX, 
-                font_scale, 
-                line_thickness
+            # Готовая метка с фоном из кэша (без растеризации текста)
+            label_image, text_height, baseline = self._label_image(
+                f"person: {confidence:.2f}", font_scale, line_thickness
             )
             
             # Позиция текста (сверху bbox или снизу, если места нет)
             text_y = y1 - 10 if y1 - 10 > text_height else y1 + text_height + 10
             
-            # Фон для текста (полупрозрачный)
-            cv2.rectangle(
-                output_frame, 
-                (x1, text_y - text_height - baseline),
-                (x1 + text_width + 4, text_y + baseline),
-                text_bg_color, 
-                -1
-            )
-            
-            # Отрисовка текста
-            cv2.putText(
-                output_frame, 
-                label, 
-                (x1 + 2, text_y - 2),
-                cv2.FONT_HERSHEY_SIMPLEX, 
-                font_scale, 
-                text_color, 
-                line_thickness,
-                cv2.LINE_AA
-            )
+            _blit(output_frame, label_image, x1, text_y - text_height - baseline)
             
         return output_frame
     
+    def _label_image(self, 
+                     label: str,
+                     font_scale: float,
+                     line_thickness: int) -> Tuple[np.ndarray, int, int]:
+        """
+        Растеризованная метка с фоном из кэша.
+        
+        Меток вида "person: 0.00" всего 101, поэтому каждая рисуется через
+        cv2.putText один раз, а дальше копируется на кадр срезом.
+        
+        Args:
+            label: Текст метки
+            font_scale: Размер шрифта
+            line_thickness: Толщина линий текста
+            
+        Returns:
+            Изображение метки, высота текста и baseline
+        """
+        key = (label, font_scale, line_thickness)
+        cached = self._label_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Цветовая схема
+        text_bg_color = (0, 255, 0)  
+        text_color = (0, 0, 0) 
+        
+        (text_width, text_height), baseline = cv2.getTextSize(
+            label, 
+            cv2.FONT_HERSHEY_SIMPLEX, 
+            font_scale, 
+            line_thickness
+        )
+        
+        image = np.empty((text_height + 2 * baseline, text_width + 4, 3), 
+                         dtype=np.uint8)
+        image[:] = text_bg_color
+        cv2.putText(
+            image, 
+            label, 
+            (2, text_height + baseline - 2),
+            cv2.FONT_HERSHEY_SIMPLEX, 
+            font_scale, 
+            text_color, 
+            line_thickness,
+            cv2.LINE_AA
+        )
+        
+        self._label_cache[key] = (image, text_height, baseline)
+        return self._label_cache[key]
+    
     def get_model_info(self) -> dict:
         """
         Получение информации о модели.
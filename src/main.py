@@ -86,6 +86,65 @@ def main():
         help='Устройство для инференса (auto если не указано)'
     )
     
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=8,
+        help='Количество кадров в одном вызове модели'
+    )
+    
+    parser.add_argument(
+        '--decode-workers',
+        type=int,
+        default=0,
+        help='Потоки параллельного декодирования по GOP через PyAV '
+             '(0 - cv2.VideoCapture)'
+    )
+    
+    parser.add_argument(
+        '--detect-interval',
+        type=int,
+        default=1,
+        help='Запускать детекцию на каждом K-м кадре, между ними - трекер'
+    )
+    
+    parser.add_argument(
+        '--hw-codec',
+        action='store_true',
+        help='Декодирование/кодирование H.264 на NVDEC/NVENC через GStreamer'
+    )
+    
+    parser.add_argument(
+        '--trt',
+        action='store_true',
+        help='Экспортировать модель в TensorRT FP16 (только CUDA)'
+    )
+    
+    parser.add_argument(
+        '--half',
+        action='store_true',
+        help='Инференс в FP16 (только CUDA)'
+    )
+    
+    parser.add_argument(
+        '--int8',
+        action='store_true',
+        help='Экспортировать модель в TensorRT INT8 с калибровкой (только CUDA)'
+    )
+    
+    parser.add_argument(
+        '--calib-video',
+        type=str,
+        default=None,
+        help='Видео для калибровки INT8 (по умолчанию --input)'
+    )
+    
+    parser.add_argument(
+        '--compile',
+        action='store_true',
+        help='Компилировать модель через torch.compile (без TensorRT)'
+    )
+    
     parser.add_argument(
         '--show-fps',
         action='store_true',
@@ -115,6 +174,7 @@ def main():
     print(f"Модель: {args.model}")
     print(f"Порог уверенности: {args.conf}")
     print(f"Порог IoU: {args.iou}")
+    print(f"Размер пачки: {args.batch_size}")
     print("=" * 60 + "\n")
     
     try:
@@ -124,7 +184,13 @@ def main():
             model_name=args.model,
             conf_threshold=args.conf,
             iou_threshold=args.iou,
-            device=args.device
+            device=args.device,
+            use_trt=args.trt,
+            half=args.half,
+            max_batch=args.batch_size,
+            int8=args.int8,
+            calib_video=args.calib_video or args.input,
+            compile=args.compile
         )
         
         # Вывод информации о модели
@@ -137,7 +203,11 @@ def main():
         processor = VideoProcessor(
             detector, 
             args.input, 
-            args.output
+            args.output,
+            batch_size=args.batch_size,
+            decode_workers=args.decode_workers,
+            detect_interval=args.detect_interval,
+            hw_codec=args.hw_codec
         )
         
         # Обработка видео
@@ -0,0 +1,159 @@
+"""Модуль для параллельного декодирования видео по GOP-интервалам."""
+
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ._pipeline import _SENTINEL, _put_until_stopped
+
+try:
+    import av
+except ImportError:  # PyAV нужен только для параллельного декодирования
+    av = None
+
+
+class ParallelDecoder:
+    """
+    Параллельный декодер видео на основе PyAV.
+    
+    Видео делится на интервалы, выровненные по ключевым кадрам, которые
+    декодируются независимо в пуле потоков (декодирование FFmpeg в PyAV
+    отпускает GIL). Кадры отдаются строго по порядку.
+    
+    Attributes:
+        path: Путь к видеофайлу
+        workers: Количество потоков декодирования
+        queue_size: Максимум готовых кадров на один декодируемый интервал
+    """
+    
+    def __init__(self, 
+                 path: str, 
+                 workers: Optional[int] = None,
+                 queue_size: int = 16):
+        """
+        Инициализация декодера.
+        
+        Args:
+            path: Путь к видеофайлу
+            workers: Количество потоков (None - половина ядер CPU)
+            queue_size: Максимум готовых кадров на один декодируемый
+                интервал; в памяти не больше workers * queue_size кадров
+                независимо от длины GOP
+        """
+        if av is None:
+            raise ImportError(
+                "Для параллельного декодирования установите PyAV: "
+                "pip install av"
+            )
+        
+        self.path = path
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.queue_size = queue_size
+    
+    def _keyframe_intervals(self) -> List[Tuple[int, Optional[int]]]:
+        """
+        Разбиение видео на интервалы [pts_start, pts_end) по ключевым кадрам.
+        
+        Читаются только пакеты контейнера, без декодирования.
+        
+        Returns:
+            Список интервалов; у последнего pts_end равен None
+        """
+        with av.open(self.path) as container:
+            stream = container.streams.video[0]
+            keyframes = sorted(
+                packet.pts
+                for packet in container.demux(stream)
+                if packet.is_keyframe and packet.pts is not None
+            )
+        
+        if not keyframes:
+            return [(0, None)]
+        
+        ends: List[Optional[int]] = keyframes[1:] + [None]
+        return list(zip(keyframes, ends))
+    
+    def _decode_interval(self,
+                         start: int,
+                         end: Optional[int],
+                         frames_q: queue.Queue,
+                         stop_event: threading.Event):
+        """
+        Декодирование одного интервала в собственном контейнере.
+        
+        Кадры кладутся в ограниченную очередь интервала, поэтому поток
+        останавливается, пока генератор не заберет готовые кадры.
+        
+        Args:
+            start: PTS ключевого кадра начала интервала
+            end: PTS начала следующего интервала (None - до конца файла)
+            frames_q: Очередь кадров интервала в формате BGR в порядке
+                показа; завершается маркером конца
+            stop_event: Событие досрочной остановки генератора
+        """
+        try:
+            with av.open(self.path) as container:
+                stream = container.streams.video[0]
+                container.seek(start, stream=stream, backward=True)
+                
+                for frame in container.decode(stream):
+                    if frame.pts is None or frame.pts < start:
+                        continue
+                    if end is not None and frame.pts >= end:
+                        break
+                    if not _put_until_stopped(
+                            frames_q, 
+                            frame.to_ndarray(format='bgr24'), 
+                            stop_event):
+                        return
+        finally:
+            # Маркер кладется и при ошибке: она выбрасывается из
+            # future.result() в генераторе
+            _put_until_stopped(frames_q, _SENTINEL, stop_event)
+    
+    def frames(self) -> Iterator[np.ndarray]:
+        """
+        Генератор кадров видео в исходном порядке.
+        
+        Одновременно декодируется не более workers интервалов, и у каждого
+        не больше queue_size готовых кадров, поэтому память ограничена
+        в кадрах, а не в GOP-ах.
+        
+        Yields:
+            Кадры в формате BGR
+        """
+        intervals = deque(self._keyframe_intervals())
+        stop_event = threading.Event()
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            
+            try:
+                while intervals or pending:
+                    while intervals and len(pending) < self.workers:
+                        frames_q = queue.Queue(maxsize=self.queue_size)
+                        future = pool.submit(self._decode_interval, 
+                                             *intervals.popleft(), 
+                                             frames_q, 
+                                             stop_event)
+                        pending.append((future, frames_q))
+                    
+                    future, frames_q = pending.popleft()
+                    while True:
+                        frame = frames_q.get()
+                        
+                        if frame is _SENTINEL:
+                            break
+                        
+                        yield frame
+                    
+                    future.result()
+            finally:
+                # Освобождаем потоки, ждущие места в очередях, иначе
+                # закрытие генератора зависнет на завершении пула
+                stop_event.set()
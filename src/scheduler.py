@@ -0,0 +1,220 @@
+"""Модуль для динамического батчинга кадров из нескольких источников."""
+
+import cv2
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from ._pipeline import _SENTINEL, _put_until_stopped
+from .detector import Detections, PersonDetector
+
+
+class FrameSource:
+    """
+    Источник кадров (видеофайл или RTSP-поток), читаемый в отдельном потоке.
+    
+    Attributes:
+        source_id: Идентификатор источника в результатах
+        uri: Путь к файлу или URL потока
+        errors: Исключения потока чтения (пусто при штатном завершении)
+    """
+    
+    def __init__(self, source_id: str, uri: str):
+        """
+        Инициализация источника.
+        
+        Args:
+            source_id: Идентификатор источника в результатах
+            uri: Путь к файлу или URL потока для cv2.VideoCapture
+        """
+        self.source_id = source_id
+        self.uri = uri
+        self.errors: List[BaseException] = []
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self,
+              output_q: queue.Queue,
+              stop_event: threading.Event):
+        """
+        Запуск потока чтения в общую очередь планировщика.
+        
+        Args:
+            output_q: Общая очередь пар (source_id, кадр)
+            stop_event: Событие досрочной остановки
+        """
+        self._thread = threading.Thread(
+            target=self._read_frames,
+            args=(output_q, stop_event),
+            daemon=True
+        )
+        self._thread.start()
+    
+    def join(self):
+        """Ожидание завершения потока чтения."""
+        if self._thread is not None:
+            self._thread.join()
+    
+    def _read_frames(self,
+                     output_q: queue.Queue,
+                     stop_event: threading.Event):
+        """
+        Поток чтения: кладет кадры источника в общую очередь.
+        
+        Args:
+            output_q: Общая очередь пар (source_id, кадр)
+            stop_event: Событие досрочной остановки
+        """
+        cap = cv2.VideoCapture(self.uri)
+        
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Не удалось открыть источник: {self.uri}")
+            
+            while not stop_event.is_set():
+                ret, frame = cap.read()
+                
+                if not ret:
+                    break
+                
+                _put_until_stopped(output_q, (self.source_id, frame), 
+                                   stop_event)
+        except BaseException as e:
+            self.errors.append(e)
+        finally:
+            cap.release()
+            _put_until_stopped(output_q, (self.source_id, _SENTINEL), 
+                               stop_event)
+
+
+class BatchScheduler:
+    """
+    Планировщик непрерывного батчинга кадров из нескольких источников.
+    
+    Кадры любых источников, готовые в пределах короткого окна ожидания,
+    собираются в одну пачку для модели, поэтому быстрые потоки не ждут
+    медленных, а GPU получает пачки максимального размера.
+    
+    Attributes:
+        detector: Экземпляр PersonDetector
+        max_batch: Максимальный размер пачки
+        timeout_ms: Окно ожидания добора пачки после первого кадра (мс)
+        prefetch: Глубина очереди на один источник
+    """
+    
+    def __init__(self,
+                 detector: PersonDetector,
+                 max_batch: int = 8,
+                 timeout_ms: float = 5.0,
+                 prefetch: int = 8):
+        """
+        Инициализация планировщика.
+        
+        Args:
+            detector: Инициализированный детектор YOLO26
+            max_batch: Максимальный размер пачки
+            timeout_ms: Окно ожидания добора пачки после первого кадра (мс)
+            prefetch: Глубина очереди на один источник
+        """
+        self.detector = detector
+        self.max_batch = max_batch
+        self.timeout_ms = timeout_ms
+        self.prefetch = prefetch
+    
+    def run(self,
+            sources: List[FrameSource],
+            on_result: Callable[[str, np.ndarray, Detections], None]) -> int:
+        """
+        Обработка всех источников до их завершения.
+        
+        Args:
+            sources: Источники кадров
+            on_result: Вызывается для каждого кадра с (source_id, кадр,
+                детекции); порядок кадров внутри источника сохраняется
+        
+        Returns:
+            Количество обработанных кадров
+        """
+        frames_q: queue.Queue = queue.Queue(
+            maxsize=self.prefetch * max(1, len(sources))
+        )
+        stop_event = threading.Event()
+        active = len(sources)
+        processed = 0
+        
+        for source in sources:
+            source.start(frames_q, stop_event)
+        
+        try:
+            while active > 0:
+                batch, finished = self._collect_batch(frames_q)
+                active -= finished
+                
+                if not batch:
+                    continue
+                
+                detections = self.detector.detect_persons_batch(
+                    [frame for _, frame in batch]
+                )
+                
+                # Раздача результатов по источникам
+                for (source_id, frame), dets in zip(batch, detections):
+                    on_result(source_id, frame, dets)
+                
+                processed += len(batch)
+        finally:
+            stop_event.set()
+            for source in sources:
+                source.join()
+        
+        # Источник с ошибкой завершается так же, как дочитанный до конца
+        for source in sources:
+            if source.errors:
+                raise RuntimeError(
+                    f"Ошибка чтения источника {source.source_id}"
+                ) from source.errors[0]
+        
+        return processed
+    
+    def _collect_batch(self, frames_q: queue.Queue) -> tuple:
+        """
+        Сбор готовых кадров: ожидание первого, затем добор до max_batch
+        в пределах timeout_ms.
+        
+        Args:
+            frames_q: Общая очередь пар (source_id, кадр)
+        
+        Returns:
+            Пачка пар (source_id, кадр) и число завершившихся источников
+        """
+        batch = []
+        finished = 0
+        deadline = None
+        
+        while len(batch) < self.max_batch:
+            if deadline is None:
+                source_id, frame = frames_q.get()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    source_id, frame = frames_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            if frame is _SENTINEL:
+                finished += 1
+                # Завершение источника возвращаем сразу, чтобы не ждать
+                # кадров от источников, которых больше нет
+                if not batch:
+                    break
+                continue
+            
+            batch.append((source_id, frame))
+            if deadline is None:
+                deadline = time.monotonic() + self.timeout_ms / 1000.0
+        
+        return batch, finished
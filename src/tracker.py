@@ -0,0 +1,188 @@
+"""Модуль для сопровождения bbox между кадрами с детекцией."""
+
+import cv2
+import numpy as np
+from typing import Callable, List, Optional
+
+from .detector import Detections
+
+
+def _create_kcf() -> Optional[Callable]:
+    """
+    Поиск конструктора KCF-трекера в установленной сборке OpenCV.
+    
+    Returns:
+        Функция создания трекера KCF или None, если KCF недоступен
+        (в OpenCV >= 4.5.1 он есть только в opencv-contrib-python)
+    """
+    for factory in (getattr(cv2, 'TrackerKCF_create', None),
+                    getattr(getattr(cv2, 'legacy', None),
+                            'TrackerKCF_create', None)):
+        if factory is not None:
+            return factory
+    return None
+
+
+def _iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Попарный IoU двух наборов bbox.
+    
+    Args:
+        a: Bbox [N, 4] (x1, y1, x2, y2)
+        b: Bbox [M, 4] (x1, y1, x2, y2)
+    
+    Returns:
+        Матрица IoU [N, M]
+    """
+    a = a[:, None, :].astype(np.float32)
+    b = b[None, :, :].astype(np.float32)
+    
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2])
+                      - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3])
+                      - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+class BoxTracker:
+    """
+    Сопровождение детекций между запусками YOLO.
+    
+    При наличии opencv-contrib используются KCF-трекеры (по одному на
+    bbox). Иначе bbox сдвигаются с постоянной скоростью, оцененной по
+    сопоставлению (IoU) детекций двух последних кадров с детекцией -
+    это векторная операция над всеми bbox без трекеров OpenCV.
+    
+    Attributes:
+        interval: Расстояние в кадрах между кадрами с детекцией
+        tracker_factory: Функция создания трекера KCF (None - без KCF)
+    """
+    
+    def __init__(self, interval: int, min_iou: float = 0.3):
+        """
+        Инициализация пустого набора треков.
+        
+        Args:
+            interval: Расстояние в кадрах между кадрами с детекцией
+            min_iou: Минимальный IoU для сопоставления детекций
+        """
+        self.interval = interval
+        self.min_iou = min_iou
+        self.tracker_factory = _create_kcf()
+        
+        if self.tracker_factory is None:
+            print("⚠️ KCF-трекер недоступен (нужен opencv-contrib-python), "
+                  "bbox между детекциями сдвигаются с постоянной скоростью")
+        
+        self._trackers: List = []
+        self._confidences = np.empty(0, dtype=np.float32)
+        self._boxes = np.empty((0, 4), dtype=np.float32)
+        self._velocity = np.empty((0, 4), dtype=np.float32)
+        self._steps = 0
+    
+    def init(self, frame: np.ndarray, detections: Detections):
+        """
+        Перезапуск треков по свежим детекциям.
+        
+        Args:
+            frame: Кадр, на котором получены детекции
+            detections: Детекции на кадре
+        """
+        self._confidences = detections.confidences
+        
+        if self.tracker_factory is not None:
+            self._trackers = []
+            for x1, y1, x2, y2 in detections.bboxes.tolist():
+                tracker = self.tracker_factory()
+                tracker.init(frame, (x1, y1, x2 - x1, y2 - y1))
+                self._trackers.append(tracker)
+            return
+        
+        boxes = detections.bboxes.astype(np.float32)
+        velocity = np.zeros_like(boxes)
+        
+        # Скорость: смещение сопоставленного bbox с прошлой детекции
+        if len(boxes) and len(self._boxes):
+            iou = _iou_matrix(boxes, self._boxes)
+            best = iou.argmax(axis=1)
+            matched = iou[np.arange(len(boxes)), best] >= self.min_iou
+            velocity[matched] = ((boxes[matched] - self._boxes[best[matched]])
+                                 / self.interval)
+        
+        # Старт нового интервала: сдвиги отсчитываются от этой детекции
+        self._boxes = boxes
+        self._velocity = velocity
+        self._steps = 0
+    
+    def update(self, frame: np.ndarray) -> Detections:
+        """
+        Сдвиг сопровождаемых bbox на новый кадр.
+        
+        Args:
+            frame: Очередной кадр без детекции
+        
+        Returns:
+            Сдвинутые детекции
+        """
+        if self.tracker_factory is not None:
+            return self._update_kcf(frame)
+        
+        h, w = frame.shape[:2]
+        self._steps += 1
+        
+        # self._boxes не меняются: они нужны для сопоставления со
+        # следующей детекцией
+        boxes = self._boxes + self._velocity * self._steps
+        boxes[:, 0::2] = boxes[:, 0::2].clip(0, w)
+        boxes[:, 1::2] = boxes[:, 1::2].clip(0, h)
+        boxes = boxes.astype(np.int32)
+        
+        valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+        
+        return Detections(bboxes=boxes[valid],
+                          confidences=self._confidences[valid])
+    
+    def _update_kcf(self, frame: np.ndarray) -> Detections:
+        """
+        Сдвиг bbox по результатам KCF-трекеров.
+        
+        Потерянные трекером объекты отбрасываются до следующей детекции.
+        
+        Args:
+            frame: Очередной кадр без детекции
+        
+        Returns:
+            Сдвинутые детекции
+        """
+        h, w = frame.shape[:2]
+        trackers, bboxes, keep = [], [], []
+        
+        for i, tracker in enumerate(self._trackers):
+            ok, (x, y, bw, bh) = tracker.update(frame)
+            
+            if not ok:
+                continue
+            
+            x1, y1 = max(int(x), 0), max(int(y), 0)
+            x2, y2 = min(int(x + bw), w), min(int(y + bh), h)
+            
+            if x2 > x1 and y2 > y1:
+                trackers.append(tracker)
+                bboxes.append((x1, y1, x2, y2))
+                keep.append(i)
+        
+        self._trackers = trackers
+        self._confidences = self._confidences[keep]
+        
+        if not bboxes:
+            return Detections.empty()
+        
+        return Detections(
+            bboxes=np.array(bboxes, dtype=np.int32),
+            confidences=self._confidences
+        )
@@ -2,10 +2,28 @@
 
 import cv2
 import os
+import queue
+from collections import deque
+import threading
 import time
-from typing import Optional, Dict, List
+from typing import Optional, Dict, Iterator, List
 from pathlib import Path
+import numpy as np
+from ._pipeline import _SENTINEL, _put_until_stopped
 from .detector import PersonDetector
+from .parallel_decoder import ParallelDecoder
+from .tracker import BoxTracker
+
+
+# GStreamer-конвейеры для декодирования/кодирования на NVDEC/NVENC
+_GST_DECODE = (
+    'filesrc location="{path}" ! qtdemux ! h264parse ! nvh264dec ! '
+    'videoconvert ! video/x-raw,format=BGR ! appsink sync=false'
+)
+_GST_ENCODE = (
+    'appsrc ! videoconvert ! nvh264enc ! h264parse ! mp4mux ! '
+    'filesink location="{path}"'
+)
 
 
 class VideoProcessor:
@@ -16,12 +34,22 @@ class VideoProcessor:
         detector: Экземпляр PersonDetector
         input_path: Путь к входному видео
         output_path: Путь к выходному видео
+        prefetch: Глубина очередей конвейера чтения/записи
+        batch_size: Количество кадров в одном вызове модели
+        decode_workers: Количество потоков параллельного декодирования
+        detect_interval: Детекция запускается на каждом K-м кадре
+        hw_codec: Аппаратное декодирование/кодирование через GStreamer
     """
     
     def __init__(self, 
                  detector: PersonDetector, 
                  input_path: str, 
-                 output_path: str):
+                 output_path: str,
+                 prefetch: int = 8,
+                 batch_size: int = 8,
+                 decode_workers: int = 0,
+                 detect_interval: int = 1,
+                 hw_codec: bool = False):
         """
         Инициализация процессора видео.
         
@@ -29,10 +57,24 @@ class VideoProcessor:
             detector: Инициализированный детектор YOLO26
             input_path: Путь к входному видео
             output_path: Путь для сохранения результата
+            prefetch: Размер очередей между потоками чтения, инференса
+                и записи (8-16 кадров)
+            batch_size: Количество кадров, передаваемых в модель за раз
+            decode_workers: Количество потоков для параллельного
+                декодирования по GOP через PyAV (0 - cv2.VideoCapture)
+            detect_interval: Запускать YOLO на каждом K-м кадре, а bbox
+                на промежуточных кадрах сдвигать трекером (1 - на каждом)
+            hw_codec: Декодировать и кодировать H.264 на NVDEC/NVENC через
+                GStreamer (при недоступности - программный FFmpeg)
         """
         self.detector = detector
         self.input_path = input_path
         self.output_path = output_path
+        self.prefetch = prefetch
+        self.batch_size = batch_size
+        self.decode_workers = decode_workers
+        self.detect_interval = max(1, detect_interval)
+        self.hw_codec = hw_codec
         
         # Проверка существования входного файла
         if not os.path.exists(input_path):
@@ -77,14 +119,42 @@ class VideoProcessor:
         print(f"Всего кадров: {total_frames}")
         print(f"Длительность: {total_frames/fps:.2f} сек\n")
         
+        # Аппаратное декодирование: параметры уже прочитаны, переоткрываем
+        # источник через GStreamer с NVDEC
+        if self.hw_codec and self.decode_workers == 0:
+            hw_cap = cv2.VideoCapture(
+                _GST_DECODE.format(path=self.input_path), cv2.CAP_GSTREAMER
+            )
+            if hw_cap.isOpened():
+                cap.release()
+                cap = hw_cap
+            else:
+                print("⚠️ NVDEC через GStreamer недоступен, "
+                      "программное декодирование")
+        
         # Создаем writer для выходного видео
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(
-            self.output_path, 
-            fourcc, 
-            fps, 
-            (width, height)
-        )
+        out = None
+        if self.hw_codec:
+            out = cv2.VideoWriter(
+                _GST_ENCODE.format(path=self.output_path),
+                cv2.CAP_GSTREAMER,
+                0,
+                fps,
+                (width, height)
+            )
+            if not out.isOpened():
+                print("⚠️ NVENC через GStreamer недоступен, "
+                      "программное кодирование")
+                out = None
+        
+        if out is None:
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(
+                self.output_path, 
+                fourcc, 
+                fps, 
+                (width, height)
+            )
         
         if not out.isOpened():
             raise ValueError(
@@ -94,66 +164,182 @@ class VideoProcessor:
         # Статистика
         frame_count = 0
         person_count_stats: List[int] = []
-        processing_times: List[float] = []
+        # Скользящее окно времени обработки для FPS с инкрементальной суммой
+        fps_window: deque = deque(maxlen=30)
+        fps_window_sum = 0.0
         start_time = time.time()
         
         print("Начало обработки...\n")
         
-        while True:
-            ret, frame = cap.read()
-            
-            if not ret:
-                break
-            
-            # Засекаем время обработки кадра
-            frame_start = time.time()
-            
-            # Детекция людей
-            detections = self.detector.detect_persons(frame)
-            person_count_stats.append(len(detections))
-            
-            # Отрисовка детекций
-            output_frame = self.detector.draw_detections(frame, detections)
-            
-            # Добавляем FPS на кадр
-            if show_fps and len(processing_times) > 0:
-                avg_fps = 1.0 / (sum(processing_times[-30:]) / 
-                                len(processing_times[-30:]))
-                fps_text = f"FPS: {avg_fps:.1f} | Persons: {len(detections)}"
-                cv2.putText(
-                    output_frame, 
-                    fps_text,
-                    (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.7,
-                    (255, 255, 255),
-                    2,
-                    cv2.LINE_AA
-                )
-            
-            # Запись обработанного кадра
-            out.write(output_frame)
-            
-            # Время обработки кадра
-            frame_time = time.time() - frame_start
-            processing_times.append(frame_time)
-            
-            frame_count += 1
+        # Конвейер: чтение (поток) -> инференс (главный поток) -> запись (поток)
+        read_q: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        write_q: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        stop_event = threading.Event()
+        
+        tracker = (BoxTracker(self.detect_interval) 
+                   if self.detect_interval > 1 else None)
+        
+        if self.decode_workers > 0:
+            frames = ParallelDecoder(
+                self.input_path, self.decode_workers
+            ).frames()
+        else:
+            # Кольцо буферов должно вмещать все кадры "в полете": обе
+            # очереди, две пачки в главном потоке (текущую и загружаемую
+            # на GPU), кадр писателя и кадр, который сейчас декодируется.
+            # На CUDA пул pinned - кадры уходят на GPU без копирования
+            pool_size = (2 * self.prefetch 
+                         + 2 * self.batch_size * self.detect_interval + 3)
+            frame_pool = self.detector.allocate_frames(pool_size, height, width)
+            frames = self._capture_frames(cap, frame_pool)
+        
+        read_errors: List[BaseException] = []
+        reader = threading.Thread(
+            target=self._read_frames,
+            args=(frames, read_q, stop_event, read_errors),
+            daemon=True
+        )
+        write_errors: List[BaseException] = []
+        writer = threading.Thread(
+            target=self._write_frames,
+            args=(out, write_q, write_errors),
+            daemon=True
+        )
+        reader.start()
+        writer.start()
+        
+        try:
+            eof = False
+            read_count = 0
+            # Пачка, загружаемая на GPU, пока модель обрабатывает текущую
+            pending = None
             
-            # Callback для прогресса
-            if progress_callback and frame_count % 30 == 0:
-                progress = (frame_count / total_frames) * 100
-                current_fps = 1.0 / frame_time if frame_time > 0 else 0
-                progress_callback(
-                    progress, 
-                    frame_count, 
-                    total_frames, 
-                    current_fps
+            while True:
+                # Набираем кадры так, чтобы в модель ушла полная пачка
+                # кадров с детекцией (каждый detect_interval-й кадр)
+                batch_frames = []
+                while (not eof and len(batch_frames) 
+                       < self.batch_size * self.detect_interval):
+                    frame = read_q.get()
+                    
+                    if frame is _SENTINEL:
+                        eof = True
+                        break
+                    
+                    batch_frames.append(frame)
+                
+                incoming = None
+                if batch_frames:
+                    is_key = [(read_count + i) % self.detect_interval == 0 
+                              for i in range(len(batch_frames))]
+                    key_frames = [frame for frame, key 
+                                  in zip(batch_frames, is_key) if key]
+                    read_count += len(batch_frames)
+                    
+                    # Загрузка следующей пачки ставится в очередь до
+                    # инференса текущей и идет параллельно с ним
+                    incoming = (batch_frames, is_key, 
+                                self.detector.stage_batch(key_frames)
+                                if key_frames else None)
+                
+                if pending is None:
+                    if incoming is None:
+                        break
+                    pending = incoming
+                    continue
+                
+                (batch_frames, is_key, staged), pending = pending, incoming
+                
+                # Детекция людей на всей пачке кадров с детекцией
+                batch_start = time.time()
+                key_detections = iter(
+                    self.detector.detect_staged(staged)
+                    if staged is not None else []
                 )
+                infer_time = (time.time() - batch_start) / len(batch_frames)
+                
+                for frame, key in zip(batch_frames, is_key):
+                    # Засекаем время обработки кадра
+                    frame_start = time.time()
+                    
+                    # На промежуточных кадрах bbox сдвигает трекер
+                    if key:
+                        detections = next(key_detections)
+                        if tracker is not None:
+                            tracker.init(frame, detections)
+                    else:
+                        detections = tracker.update(frame)
+                    
+                    person_count_stats.append(len(detections.bboxes))
+                    
+                    # Отрисовка детекций
+                    # (исходный кадр дальше не нужен - рисуем без копии)
+                    output_frame = self.detector.draw_detections(
+                        frame, detections, in_place=True
+                    )
+                    
+                    # Добавляем FPS на кадр
+                    if show_fps and fps_window_sum > 0:
+                        avg_fps = len(fps_window) / fps_window_sum
+                        fps_text = (f"FPS: {avg_fps:.1f} | "
+                                    f"Persons: {len(detections.bboxes)}")
+                        cv2.putText(
+                            output_frame, 
+                            fps_text,
+                            (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX,
+                            0.7,
+                            (255, 255, 255),
+                            2,
+                            cv2.LINE_AA
+                        )
+                    
+                    # Передача кадра потоку записи
+                    if not _put_until_stopped(write_q, output_frame, 
+                                              stop_event, writer):
+                        raise RuntimeError(
+                            "Поток записи видео завершился с ошибкой"
+                        ) from (write_errors[0] if write_errors else None)
+                    
+                    # Время обработки кадра (доля инференса пачки + отрисовка)
+                    frame_time = infer_time + (time.time() - frame_start)
+                    if len(fps_window) == fps_window.maxlen:
+                        fps_window_sum -= fps_window[0]
+                    fps_window_sum += frame_time
+                    fps_window.append(frame_time)
+                    
+                    frame_count += 1
+                    
+                    # Callback для прогресса
+                    if progress_callback and frame_count % 30 == 0:
+                        progress = (frame_count / total_frames) * 100
+                        current_fps = 1.0 / frame_time if frame_time > 0 else 0
+                        progress_callback(
+                            progress, 
+                            frame_count, 
+                            total_frames, 
+                            current_fps
+                        )
+        finally:
+            # Останавливаем потоки и освобождаем ресурсы
+            _put_until_stopped(write_q, _SENTINEL, stop_event, writer)
+            stop_event.set()
+            writer.join()
+            reader.join()
+            cap.release()
+            out.release()
+        
+        # Маркер конца от упавшего декодера неотличим от конца файла -
+        # без этой проверки обрезанное видео считалось бы успехом
+        if read_errors:
+            raise RuntimeError(
+                "Поток чтения видео завершился с ошибкой"
+            ) from read_errors[0]
         
-        # Освобождаем ресурсы
-        cap.release()
-        out.release()
+        if write_errors:
+            raise RuntimeError(
+                "Поток записи видео завершился с ошибкой"
+            ) from write_errors[0]
         
         # Финальная статистика
         total_time = time.time() - start_time
@@ -178,6 +364,84 @@ class VideoProcessor:
         
         return stats
     
+    @staticmethod
+    def _capture_frames(cap: cv2.VideoCapture, 
+                        frame_pool: np.ndarray) -> Iterator[np.ndarray]:
+        """
+        Генератор кадров из VideoCapture до конца файла.
+        
+        Кадры декодируются по кругу в предвыделенные буферы пула вместо
+        выделения нового массива на каждый кадр.
+        
+        Args:
+            cap: Открытый VideoCapture
+            frame_pool: Пул буферов [N, H, W, 3] uint8
+            
+        Yields:
+            Кадры в формате BGR (виды на буферы пула)
+        """
+        index = 0
+        
+        while True:
+            ret, frame = cap.read(frame_pool[index])
+            
+            if not ret:
+                break
+            
+            yield frame
+            index = (index + 1) % len(frame_pool)
+    
+    @staticmethod
+    def _read_frames(frames: Iterator[np.ndarray],
+                     read_q: queue.Queue,
+                     stop_event: threading.Event,
+                     errors: List[BaseException]):
+        """
+        Поток чтения: декодирует кадры и кладет их в очередь.
+        
+        Args:
+            frames: Итератор декодированных кадров
+            read_q: Очередь для декодированных кадров
+            stop_event: Событие досрочной остановки конвейера
+            errors: Список, куда сохраняется исключение потока для
+                повторного выброса в главном потоке
+        """
+        try:
+            for frame in frames:
+                if stop_event.is_set():
+                    break
+                
+                _put_until_stopped(read_q, frame, stop_event)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            frames.close()
+            _put_until_stopped(read_q, _SENTINEL, stop_event)
+    
+    @staticmethod
+    def _write_frames(out: cv2.VideoWriter, 
+                      write_q: queue.Queue,
+                      errors: List[BaseException]):
+        """
+        Поток записи: кодирует кадры из очереди до получения маркера конца.
+        
+        Args:
+            out: Открытый VideoWriter
+            write_q: Очередь обработанных кадров
+            errors: Список, куда сохраняется исключение потока для
+                повторного выброса в главном потоке
+        """
+        try:
+            while True:
+                frame = write_q.get()
+                
+                if frame is _SENTINEL:
+                    break
+                
+                out.write(frame)
+        except BaseException as e:
+            errors.append(e)
+    
     def _print_final_stats(self, stats: Dict):
         """Вывод финальной статистики обработки."""
         print(f"\n{'='*50}")